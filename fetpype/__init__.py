@@ -1,6 +1,5 @@
-from . import pipelines  # noqa
-from . import nodes  # noqa
-from . import utils  # noqa
+import importlib
+
 from .definitions import (  # noqa
     VALID_RECONSTRUCTION,
     VALID_SEGMENTATION,
@@ -11,6 +10,17 @@ from .definitions import (  # noqa
     VALID_SURF_TAGS,
 )
 
+# The subpackages import nipype and pybids. They are only imported when
+# first accessed, so that e.g. the command line help is displayed quickly.
+_SUBPACKAGES = ("pipelines", "nodes", "utils")
+
+
+def __getattr__(name):
+    if name in _SUBPACKAGES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __version__ = "unknown"
 try:
     from ._version import __version__  # noqa
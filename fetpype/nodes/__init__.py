@@ -1 +1,7 @@
-from .utils import is_valid_cmd, get_mount_docker, get_directory  # noqa
+from .utils import (  # noqa
+    is_valid_cmd,
+    get_mount_docker,
+    get_directory,
+    link_or_copy,
+    replace_tags,
+)
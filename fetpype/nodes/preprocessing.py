@@ -121,10 +121,12 @@ class CropStacksAndMasks(BaseInterface):
         image_ni = ni.load(image_path)
         mask_ni = ni.load(mask_path)
 
-        image = image_ni.get_fdata()
-        mask = mask_ni.get_fdata()
+        # Only the mask is read in full, in its on-disk dtype. The image
+        # is read through its (memory-mapped, if uncompressed) data
+        # proxy, and only the cropped region is loaded and cast to float.
+        mask = np.asanyarray(mask_ni.dataobj)
 
-        assert all([i >= m] for i, m in zip(image.shape, mask.shape)), (
+        assert all([i >= m] for i, m in zip(image_ni.shape, mask.shape)), (
             "For a correct cropping, the image should be larger "
             "or equal to the mask."
         )
@@ -144,7 +146,7 @@ class CropStacksAndMasks(BaseInterface):
             boundary_j = np.round(boundary_j / float(spacing[1]))
             boundary_k = np.round(boundary_k / float(spacing[2]))
 
-        shape = [min(im, m) for im, m in zip(image.shape, mask.shape)]
+        shape = [min(im, m) for im, m in zip(image_ni.shape, mask.shape)]
         x_range[0] = np.max([0, x_range[0] - boundary_i])
         x_range[1] = np.min([shape[0], x_range[1] + boundary_i])
 
@@ -163,16 +165,13 @@ class CropStacksAndMasks(BaseInterface):
         new_affine = image_ni.affine
         new_affine[:, -1] = new_origin
 
-        image_cropped = image[
-            x_range[0] : x_range[1],  # noqa: E203
-            y_range[0] : y_range[1],  # noqa: E203
-            z_range[0] : z_range[1],  # noqa: E203
-        ]
-        mask_cropped = mask[
-            x_range[0] : x_range[1],  # noqa: E203
-            y_range[0] : y_range[1],  # noqa: E203
-            z_range[0] : z_range[1],  # noqa: E203
-        ]
+        crop = (
+            slice(x_range[0], x_range[1]),
+            slice(y_range[0], y_range[1]),
+            slice(z_range[0], z_range[1]),
+        )
+        image_cropped = np.asarray(image_ni.dataobj[crop], dtype=np.float64)
+        mask_cropped = np.asarray(mask[crop], dtype=np.float64)
 
         image_cropped = ni.Nifti1Image(image_cropped, new_affine)
         mask_cropped = ni.Nifti1Image(mask_cropped, new_affine)
@@ -500,6 +499,10 @@ class CheckAndSortStacksAndMasks(BaseInterface):
         stacks_run = get_run_id(self.inputs.stacks)
         masks_run = get_run_id(self.inputs.masks)
 
+        # Create the output directories once for all stacks
+        out_dir_stacks = self._gen_filename("output_dir_stacks")
+        out_dir_masks = self._gen_filename("output_dir_masks")
+
         out_stacks = []
         out_masks = []
         for i, s in enumerate(stacks_run):
@@ -507,13 +510,11 @@ class CheckAndSortStacksAndMasks(BaseInterface):
 
             if s in masks_run:
                 out_stack = os.path.join(
-                    self._gen_filename("output_dir_stacks"),
-                    os.path.basename(in_stack),
+                    out_dir_stacks, os.path.basename(in_stack)
                 )
                 in_mask = self.inputs.masks[masks_run.index(s)]
                 out_mask = os.path.join(
-                    self._gen_filename("output_dir_masks"),
-                    os.path.basename(in_mask),
+                    out_dir_masks, os.path.basename(in_mask)
                 )
                 out_stacks.append(out_stack)
                 out_masks.append(out_mask)
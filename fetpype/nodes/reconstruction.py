@@ -22,9 +22,6 @@ def run_recon_cmd(
         str: Path to the output volume after reconstruction.
     """
     import os
-    import numpy as np
-    import nibabel as nib
-    import traceback
     from fetpype import VALID_RECON_TAGS as VALID_TAGS
     from fetpype.nodes import is_valid_cmd, get_directory, get_mount_docker
     from fetpype.utils.logging import run_and_tee
@@ -57,6 +54,11 @@ def run_recon_cmd(
         )
         output_volume = os.path.join(output_dir, cfg.path_to_output)
     if "<input_tp>" in cmd:
+        # Only needed to compute the slice thickness
+        import traceback
+        import numpy as np
+        import nibabel as nib
+
         try:
             input_tp = np.round(
                 np.mean(
@@ -22,7 +22,12 @@ def run_seg_cmd(
     """
     import os
     from fetpype import VALID_SEG_TAGS as VALID_TAGS
-    from fetpype.nodes import is_valid_cmd, get_mount_docker
+    from fetpype.nodes import (
+        is_valid_cmd,
+        get_mount_docker,
+        link_or_copy,
+        replace_tags,
+    )
     from fetpype.utils.logging import run_and_tee
 
     is_valid_cmd(cmd, VALID_TAGS)
@@ -36,26 +41,18 @@ def run_seg_cmd(
                 "input_srr is a list, and contains multiple elements. "
                 "It should be a single element."
             )
-    # Copy input_srr to input_directory
+    # Link (or copy) input_srr to input_directory
     # Avoid mounting problematic directories
     input_srr_dir = os.path.join(os.getcwd(), "seg/input")
     os.makedirs(input_srr_dir, exist_ok=True)
-    os.system(f"cp {input_srr} {input_srr_dir}/input_srr.nii.gz")
-    input_srr = os.path.join(input_srr_dir, "input_srr.nii.gz")
+    input_srr = link_or_copy(
+        input_srr, os.path.join(input_srr_dir, "input_srr.nii.gz")
+    )
 
     output_dir = os.path.join(os.getcwd(), "seg/out")
     seg = os.path.join(output_dir, "seg.nii.gz")
 
-    # In cmd, there will be things contained in <>.
-    # Check that everything that is in <> is in valid_tags
-    # If not, raise an error
-
-    # Replace the tags in the command
-    cmd = cmd.replace("<input_srr>", input_srr)
-    cmd = cmd.replace("<input_dir>", input_srr_dir)
-    cmd = cmd.replace("<output_seg>", seg)
     if "<output_dir>" in cmd:
-        cmd = cmd.replace("<output_dir>", output_dir)
         # Assert that args.path_to_output is defined
         assert cfg.path_to_output is not None, (
             "<output_dir> found in the command of reconstruction, "
@@ -70,25 +67,22 @@ def run_seg_cmd(
             # Remove all extensions (handles both .nii.gz and .nii cases)
             basename_no_ext = basename.split(".")[0]
             seg = seg.replace("<basename>", basename_no_ext)
-    if "<mount>" in cmd:
-        mount_cmd = get_mount_docker(input_srr_dir, output_dir)
-        cmd = cmd.replace("<mount>", mount_cmd)
-    if "<singularity_path>" in cmd:
-        # assume that if we have a singularity path,
-        # we are using singularity and the
-        # parameter has been set in the config file
-        cmd = cmd.replace("<singularity_path>", singularity_path)
-    if "<singularity_mount>" in cmd:
-        # assume that if we have a singularity mount path,
-        # we are using singularity and the
-        # parameter has been set in the config file
-        cmd = cmd.replace("<singularity_mount>", singularity_mount)
 
-    if "<singularity_home>" in cmd:
-        # assume that if we have a singularity mount path,
-        # we are using singularity and the
-        # parameter has been set in the config file
-        cmd = cmd.replace("<singularity_home>", singularity_home)
+    # Replace the tags in the command. The singularity tags assume
+    # that, if present, the parameters have been set in the config file.
+    cmd = replace_tags(
+        cmd,
+        {
+            "input_srr": input_srr,
+            "input_dir": input_srr_dir,
+            "output_seg": os.path.join(output_dir, "seg.nii.gz"),
+            "output_dir": output_dir,
+            "mount": lambda: get_mount_docker(input_srr_dir, output_dir),
+            "singularity_path": singularity_path,
+            "singularity_mount": singularity_mount,
+            "singularity_home": singularity_home,
+        },
+    )
 
     run_and_tee(cmd)
 
@@ -22,7 +22,7 @@ def run_surf_cmd(
     """
     import os
     from fetpype import VALID_SURF_TAGS as VALID_TAGS
-    from fetpype.nodes import is_valid_cmd, get_mount_docker
+    from fetpype.nodes import is_valid_cmd, get_mount_docker, link_or_copy
     from fetpype.utils.logging import run_and_tee
 
     is_valid_cmd(cmd, VALID_TAGS)
@@ -36,12 +36,13 @@ def run_surf_cmd(
                 "input_seg is a list, and contains multiple elements. "
                 "It should be a single element."
             )
-    # Copy input_seg to input_directory
+    # Link (or copy) input_seg to input_directory
     # Avoid mounting problematic directories
     input_seg_dir = os.path.join(os.getcwd(), "seg/input")
     os.makedirs(input_seg_dir, exist_ok=True)
-    os.system(f"cp {input_seg} {input_seg_dir}/input_seg.nii.gz")
-    input_seg = os.path.join(input_seg_dir, "input_seg.nii.gz")
+    input_seg = link_or_copy(
+        input_seg, os.path.join(input_seg_dir, "input_seg.nii.gz")
+    )
 
     output_dir = os.path.join(os.getcwd(), "surf/out")
     os.makedirs(output_dir, exist_ok=True)
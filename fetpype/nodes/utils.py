@@ -1,5 +1,8 @@
 import os
 import re
+import shutil
+
+TAG_REGEX = re.compile(r"<(\w+)>")
 
 
 def is_docker(pre_command):
@@ -37,6 +40,22 @@ def get_mount_docker(*args):
     return " ".join([f"-v {arg}:{arg}" for arg in mount_args])
 
 
+def link_or_copy(src, dst):
+    """
+    Hardlink `src` to `dst`, avoiding a full copy of large volumes.
+    Falls back to a copy if `src` and `dst` are not on the same
+    filesystem, or if the filesystem does not support hardlinks.
+    An existing `dst` is replaced.
+    """
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+    return dst
+
+
 def is_valid_cmd(cmd, valid_tags):
     for tag in re.findall(r"\<(.*?)\>", cmd):
         if tag not in valid_tags:
@@ -46,6 +65,29 @@ def is_valid_cmd(cmd, valid_tags):
         raise ValueError("Docker command must have a <mount> tag")
 
 
+def replace_tags(cmd, tags):
+    """
+    Replace all the <tag> of `cmd` in a single pass.
+
+    Args:
+        cmd (str): Command containing <tag> placeholders.
+        tags (dict): Mapping from tag name to its value. A callable value
+            is only called if the tag is present in `cmd`.
+    Returns:
+        str: The command with the tags in `tags` replaced. Tags that are
+        not in `tags` are left untouched.
+    """
+
+    def replace(match):
+        tag = match.group(1)
+        if tag not in tags:
+            return match.group(0)
+        value = tags[tag]
+        return value() if callable(value) else value
+
+    return TAG_REGEX.sub(replace, cmd)
+
+
 def get_run_id(file_list):
     """
     Get the run ID from the file name.
@@ -657,7 +657,7 @@ def create_dhcp_subpipe(name="dhcp_pipe", params={}):
     # Check params to see if we need to run the seg or surf part, or both.
     # Params to look is [dhcp][seg] and [dhcp][surf]
     flag = None
-    if "dhcp" in params.keys():
+    if "dhcp" in params:
         if params["dhcp"]["surf"] and params["dhcp"]["seg"]:
             flag = "-all"
         elif params["dhcp"]["seg"]:
@@ -688,11 +688,11 @@ def create_dhcp_subpipe(name="dhcp_pipe", params={}):
         name="dhcp_seg",
     )
 
-    if "general" in params.keys():
+    if "general" in params:
         dhcp_seg.inputs.pre_command = params["general"].get("pre_command", "")
         dhcp_seg.inputs.dhcp_image = params["general"].get("dhcp_image", "")
 
-    if "dhcp" in params.keys():
+    if "dhcp" in params:
         dhcp_seg.inputs.threads = params["dhcp"].get("threads", "")
         dhcp_seg.inputs.flag = flag
 
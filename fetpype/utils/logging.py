@@ -1,5 +1,6 @@
 import os
 import re
+import shlex
 import sys
 import logging
 import time
@@ -238,9 +239,11 @@ def run_and_tee(cmd, *, prefix=""):
     """
     Run a command, stream output live to terminal, and log every line.
     Returns the full combined output; raises RuntimeError on non-zero exit.
+    The command is run directly, without going through a shell.
 
     Args:
-        cmd (str): The command to run.
+        cmd (str or list): The command to run, either as a string
+            (split with shell-like syntax) or as a list of arguments.
         prefix (str): A prefix to add to each line of output.
 
     Returns:
@@ -255,15 +258,19 @@ def run_and_tee(cmd, *, prefix=""):
     env.setdefault("PYTHONIOENCODING", "utf-8")
     env.setdefault("TQDM_DISABLE", "1")  # avoid CR-based progress bars
 
-    proc = subprocess.Popen(
-        cmd,
-        shell=True,  # keep if you're passing a single string
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,  # merge stderr -> stdout
-        text=True,
-        bufsize=1,  # line-buffered
-        env=env,
-    )
+    argv = shlex.split(cmd) if isinstance(cmd, str) else list(cmd)
+    cmd = shlex.join(argv)
+    try:
+        proc = subprocess.Popen(
+            argv,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,  # merge stderr -> stdout
+            text=True,
+            bufsize=1,  # line-buffered
+            env=env,
+        )
+    except OSError as e:
+        raise RuntimeError(f"Could not run command: {cmd}\n{e}") from e
 
     log_evt.info("Running: %s", cmd)  # one structured line
 
@@ -277,7 +284,7 @@ def run_and_tee(cmd, *, prefix=""):
 
     proc.stdout.close()
     rc = proc.wait()
-    output = "".join(captured)
+    output = "\n".join(captured)
 
     if rc != 0:
         raise RuntimeError(
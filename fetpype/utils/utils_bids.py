@@ -1,14 +1,259 @@
 import os.path as op
 
+import functools
+import hashlib
 import json
 import os
-from bids.layout import BIDSLayout
+import shutil
+from collections import defaultdict
+from bids.layout import BIDSLayout, BIDSLayoutIndexer
 
 import nipype.interfaces.io as nio
 import nipype.pipeline.engine as pe
 from omegaconf import OmegaConf
 import re
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# pybids ignores these folders by default, but drops its defaults
+# as soon as a custom `ignore` list is given.
+BIDS_DEFAULT_IGNORE = [re.compile(r"^/(code|models|sourcedata|stimuli)")]
+
+
+def get_layout_ignore(subjects=None, ignore_datatypes=None):
+    """Get the `ignore` patterns used when indexing a BIDS dataset.
+
+    If `subjects` is given, the folders of all the other subjects are
+    ignored, so that they are not traversed when building the BIDSLayout.
+    Likewise, the datatype folders (e.g. `dwi`, `func`) listed in
+    `ignore_datatypes` are not traversed.
+
+    Args:
+        subjects (list, optional): List of subject IDs to index.
+            If None, all subjects are indexed.
+        ignore_datatypes (list, optional): List of datatypes that
+            are not indexed.
+    Returns:
+        list: List of compiled regular expressions, matched against
+        paths relative to the dataset root.
+    """
+    ignore = list(BIDS_DEFAULT_IGNORE)
+    if subjects is not None:
+        keep = "|".join(re.escape(sub) for sub in subjects)
+        ignore.append(re.compile(rf"^/sub-(?!(?:{keep})(?:/|$))"))
+    if ignore_datatypes:
+        datatypes = "|".join(re.escape(dt) for dt in ignore_datatypes)
+        ignore.append(
+            re.compile(
+                rf"^/sub-[^/]+/(?:ses-[^/]+/)?(?:{datatypes})(?:/|$)"
+            )
+        )
+    return ignore
+
+
+def build_layout(data_dir, subjects=None, ignore_datatypes=None):
+    """Index a BIDS dataset, restricted to `subjects` if provided.
+
+    Args:
+        data_dir (str): The base directory of the BIDS dataset.
+        subjects (list, optional): List of subject IDs to index.
+            If None, all subjects are indexed.
+        ignore_datatypes (list, optional): List of datatypes that
+            are not indexed.
+    Returns:
+        BIDSLayout: The layout of the dataset.
+    """
+    # validate=False is needed as the validation
+    # does not work with our segmentation files.
+    indexer = BIDSLayoutIndexer(
+        validate=False, ignore=get_layout_ignore(subjects, ignore_datatypes)
+    )
+    return BIDSLayout(data_dir, validate=False, indexer=indexer)
+
+
+def get_indexed_dirs(data_dir, subjects=None, ignore_datatypes=None):
+    """List the subject, session and datatype folders that are indexed.
+
+    Only directories are listed: the files themselves are not visited.
+
+    Args:
+        data_dir (str): The base directory of the BIDS dataset.
+        subjects (list, optional): List of subject IDs that are indexed.
+            If None, all subjects are indexed.
+        ignore_datatypes (list, optional): List of datatypes that
+            are not indexed.
+    Returns:
+        list: Sorted paths of the `sub-*`, `sub-*/ses-*` and
+        `sub-*/[ses-*/]<datatype>` folders.
+    """
+    ignore_datatypes = set(ignore_datatypes or [])
+
+    def list_dirs(path):
+        with os.scandir(path) as entries:
+            return [entry for entry in entries if entry.is_dir()]
+
+    dirs = []
+    for sub_dir in list_dirs(data_dir):
+        if not sub_dir.name.startswith("sub-"):
+            continue
+        if subjects is not None and sub_dir.name[4:] not in subjects:
+            continue
+        dirs.append(sub_dir.path)
+        for entry in list_dirs(sub_dir.path):
+            if entry.name.startswith("ses-"):
+                dirs.append(entry.path)
+                dirs.extend(
+                    dt_dir.path
+                    for dt_dir in list_dirs(entry.path)
+                    if dt_dir.name not in ignore_datatypes
+                )
+            elif entry.name not in ignore_datatypes:
+                dirs.append(entry.path)
+    return sorted(dirs)
+
+
+def get_layout_db_path(
+    data_dir, nipype_dir, subjects=None, ignore_datatypes=None
+):
+    """Get the path where the BIDSLayout index of `data_dir` is cached.
+
+    The path is keyed on `data_dir`, on the indexed `subjects` and on the
+    modification times of the dataset root, of its
+    `dataset_description.json` and of the indexed subject, session and
+    datatype folders (see `get_indexed_dirs`). Adding, removing or
+    renaming a file in these folders thus invalidates the cache.
+    The folder is named `layout_db_<dataset key>_<state key>`, where the
+    dataset key only depends on `data_dir`, `subjects` and
+    `ignore_datatypes`, so that outdated indexes can be found.
+
+    Args:
+        data_dir (str): The base directory of the BIDS dataset.
+        nipype_dir (str): The nipype working directory, where the
+            index is stored.
+        subjects (list, optional): List of subject IDs that are indexed.
+            If None, all subjects are indexed.
+        ignore_datatypes (list, optional): List of datatypes that
+            are not indexed.
+    Returns:
+        str: Path to the folder containing the layout database.
+    """
+    dataset_key = [op.abspath(data_dir)]
+    if subjects is not None:
+        dataset_key.append(",".join(sorted(subjects)))
+    if ignore_datatypes:
+        dataset_key.append("ignore:" + ",".join(sorted(ignore_datatypes)))
+    state_key = []
+    for path in [data_dir, op.join(data_dir, "dataset_description.json")]:
+        if op.exists(path):
+            state_key.append(str(os.stat(path).st_mtime_ns))
+    for path in get_indexed_dirs(data_dir, subjects, ignore_datatypes):
+        mtime = os.stat(path).st_mtime_ns
+        state_key.append(f"{op.relpath(path, data_dir)}:{mtime}")
+
+    def hash_key(key):
+        return hashlib.sha1("|".join(key).encode("utf-8")).hexdigest()[:12]
+
+    return op.join(
+        nipype_dir, f"layout_db_{hash_key(dataset_key)}_{hash_key(state_key)}"
+    )
+
+
+def prune_layout_dbs(layout_db):
+    """Remove the outdated indexes of the dataset indexed in `layout_db`.
+
+    The indexes of the same dataset (see `get_layout_db_path`) that are
+    stored next to `layout_db` are removed, while the indexes of other
+    datasets or subjects are kept.
+
+    Args:
+        layout_db (str): Path to the up-to-date layout database.
+    """
+    nipype_dir, name = op.split(layout_db)
+    prefix = name.rsplit("_", 1)[0] + "_"
+    with os.scandir(nipype_dir) as entries:
+        for entry in entries:
+            if (
+                entry.name.startswith(prefix)
+                and entry.name != name
+                and entry.is_dir()
+            ):
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def get_layout(
+    data_dir, nipype_dir, subjects=None, save_db=False, ignore_datatypes=None
+):
+    """
+    Get the BIDSLayout of `data_dir`, restricted to `subjects`.
+    If `save_db`, the layout is loaded from its cached index in
+    `nipype_dir` (see `get_layout_db_path`), and indexed and saved
+    there if the cache does not exist yet. The outdated indexes of
+    the dataset are then removed.
+
+    Args:
+        data_dir (str): The base directory of the BIDS dataset.
+        nipype_dir (str): The nipype working directory.
+        subjects (list, optional): List of subject IDs to index.
+        save_db (bool, optional): Whether to use the cached index.
+        ignore_datatypes (list, optional): List of datatypes that
+            are not indexed.
+    Returns:
+        BIDSLayout: The layout of `data_dir`.
+    """
+    if not save_db:
+        return build_layout(data_dir, subjects, ignore_datatypes)
+
+    layout_db = get_layout_db_path(
+        data_dir, nipype_dir, subjects, ignore_datatypes
+    )
+    if op.exists(op.join(layout_db, "layout_index.sqlite")):
+        return BIDSLayout.load(layout_db)
+    layout = build_layout(data_dir, subjects, ignore_datatypes)
+    layout.save(layout_db)
+    prune_layout_dbs(layout_db)
+    return layout
+
+
+def close_layout(layout):
+    """
+    Close the sqlite session and connections of a BIDSLayout.
+    The layout cannot be queried afterwards.
+
+    Args:
+        layout (BIDSLayout): The layout to close.
+    """
+    layout.connection_manager.session.close()
+    layout.connection_manager.engine.dispose()
+
+
+def get_subject_entities(layout, subjects):
+    """Get the sessions and acquisitions available for each subject.
+
+    The layout is queried once for all subjects, rather than once per
+    subject and session.
+
+    Args:
+        layout (BIDSLayout): The layout of the BIDS dataset.
+        subjects (list): List of subject IDs.
+    Returns:
+        dict: A dictionary `{sub: {ses: [acq, ...]}}`. Files without
+        session are listed under the `None` session.
+    """
+    entities = {sub: defaultdict(set) for sub in subjects}
+    if len(subjects) > 0:
+        for bids_file in layout.get(subject=list(subjects)):
+            ent = bids_file.entities
+            acqs = entities[ent["subject"]][ent.get("session")]
+            if ent.get("acquisition") is not None:
+                acqs.add(ent["acquisition"])
+    return {
+        sub: {ses: sorted(acqs) for ses, acqs in ses_acqs.items()}
+        for sub, ses_acqs in entities.items()
+    }
+
 
 def create_datasource(
     output_query,
@@ -21,6 +266,8 @@ def create_datasource(
     name="bids_datasource",
     extra_derivatives=None,
     save_db=False,
+    layout=None,
+    ignore_datatypes=None,
 ):
     """Create a datasource node that have iterables following BIDS format.
     By default, from a BIDSLayout, lists all the subjects (`<sub>`),
@@ -30,7 +277,8 @@ def create_datasource(
 
     If a list of subjects/sessions/acquisitions is provided, the
     BIDSLayout is not queried and the provided
-    subjects/sessions/acquisitions are used as is.
+    subjects/sessions/acquisitions are used as is. Only the folders
+    of the provided subjects are then indexed.
 
     If derivative is not None, the BIDSLayout will be queried for
     the specified derivative.
@@ -47,6 +295,7 @@ def create_datasource(
         output_query (dict): A dictionary specifying the output query
             for the BIDSDataGrabber.
         data_dir (str): The base directory of the BIDS dataset.
+        nipype_dir (str): The nipype working directory.
         subjects (list, optional): List of subject IDs to include.
             If None, all subjects in the dataset are included.
         sessions (list, optional): List of session IDs to include.
@@ -60,15 +309,31 @@ def create_datasource(
         extra_derivatives (list or str, optional): Additional
             derivatives to include. If provided, these will be
             added to the BIDSDataGrabber.
+        save_db (bool, optional): Whether to cache the BIDSLayout index
+            in `nipype_dir` (see `get_layout_db_path`). The cached index is
+            reused by later runs and by the BIDSDataGrabber, which then
+            does not re-index `data_dir` for every subject. Defaults to False.
+        layout (BIDSLayout, optional): A layout of `data_dir`, as returned
+            by `get_layout` with the same `nipype_dir`, `subjects`,
+            `save_db` and `ignore_datatypes`. If None, it is loaded or
+            built here. The layout is closed once the iterables are built.
+        ignore_datatypes (list, optional): List of datatypes (e.g.
+            `dwi`, `func`) that are not indexed, to speed up the
+            indexing of large datasets.
     Returns:
         pe.Node: A configured BIDSDataGrabber node that retrieves data
         according to the specified parameters.
     """
 
+    # With `save_db`, the datasource only queries the cached index: it is
+    # run in the main process rather than being submitted to a worker.
+    # Otherwise, each datasource indexes `data_dir` again, and is left to
+    # the workers so that the indexings run in parallel.
     bids_datasource = pe.Node(
         interface=nio.BIDSDataGrabber(),
         name=name,
         synchronize=True,
+        run_without_submitting=save_db,
     )
 
     bids_datasource.inputs.base_dir = data_dir
@@ -79,25 +344,20 @@ def create_datasource(
         bids_datasource.inputs.extra_derivatives = extra_derivatives
     bids_datasource.inputs.output_query = output_query
 
-    layout = BIDSLayout(data_dir, validate=False)
-
-    # Needed as the layout uses validate which
-    # does not work with our segmentation files.
-
+    # Only the requested subjects are indexed.
+    if layout is None:
+        layout = get_layout(
+            data_dir, nipype_dir, subjects, save_db, ignore_datatypes
+        )
     if save_db:
-        layout_db = os.path.join(nipype_dir, "layout_db")
-        if os.path.exists(layout_db):
-            os.remove(os.path.join(layout_db, "layout_index.sqlite"))
-        layout.save(layout_db)
-
-        bids_datasource.inputs.load_layout = layout_db
+        bids_datasource.inputs.load_layout = get_layout_db_path(
+            data_dir, nipype_dir, subjects, ignore_datatypes
+        )
 
     # Verbose
     print("BIDS layout:", layout)
     print("\t", layout.get_subjects())
     print("\t", layout.get_sessions())
-    iterables = [("subject", "session", "acquisition"), []]
-
     existing_sub = layout.get_subjects()
     if subjects is None:
         subjects = existing_sub
@@ -108,76 +368,89 @@ def create_datasource(
                 f"Requested subject {sub} was not found in the "
                 f"folder {data_dir}."
             )
-
-        existing_ses = layout.get_sessions(subject=sub)
-        if sessions is None:
-            sessions_subj = existing_ses
-        else:
-            sessions_subj = sessions
-        # If no sessions are found, it is possible that there is no session.
-        sessions_subj = [None] if len(sessions_subj) == 0 else sessions_subj
+    subject_entities = get_subject_entities(layout, subjects)
+    # The workers only get the path to the index: release the layout
+    # rather than having MultiProc fork its sqlite connection.
+    close_layout(layout)
+
+    def sessions_for(sub):
+        existing_ses = sorted(
+            ses for ses in subject_entities[sub] if ses is not None
+        )
+        sessions_subj = existing_ses if sessions is None else sessions
         for ses in sessions_subj:
-            if ses is not None and ses not in existing_ses:
+            if ses not in existing_ses:
                 print(
                     f"WARNING: Session {ses} was not found for subject {sub}."
                 )
-            existing_acq = layout.get_acquisition(subject=sub, session=ses)
-            if acquisitions is None:
-                acquisitions_subj = existing_acq
-            else:
-                acquisitions_subj = acquisitions
-            # If there is no acquisition found, maybe the acquisition
-            # tag was not specified.
-            acquisitions_subj = (
-                [None] if len(acquisitions_subj) == 0 else acquisitions_subj
-            )
-            for acq in acquisitions_subj:
-                if acq is not None and acq not in existing_acq:
-                    print(
-                        f"WARNING: Acquisition {acq} was not found for "
-                        f"subject {sub} session {ses}."
-                    )
+        # If no sessions are found, it is possible that there is no session.
+        return sessions_subj if len(sessions_subj) > 0 else [None]
 
-                iterables[1] += [(sub, ses, acq)]
+    def acquisitions_for(sub, ses):
+        existing_acq = subject_entities[sub].get(ses, [])
+        acquisitions_subj = (
+            existing_acq if acquisitions is None else acquisitions
+        )
+        for acq in acquisitions_subj:
+            if acq not in existing_acq:
+                print(
+                    f"WARNING: Acquisition {acq} was not found for "
+                    f"subject {sub} session {ses}."
+                )
+        # If there is no acquisition found, maybe the acquisition
+        # tag was not specified.
+        return acquisitions_subj if len(acquisitions_subj) > 0 else [None]
 
+    iterables = [
+        ("subject", "session", "acquisition"),
+        [
+            (sub, ses, acq)
+            for sub in subjects
+            for ses in sessions_for(sub)
+            for acq in acquisitions_for(sub, ses)
+        ],
+    ]
     bids_datasource.iterables = iterables
 
     return bids_datasource
 
 
-def create_bids_datasink(
+# Generic cleanup rules, applied after the mapping rules.
+BIDS_CLEANUP_REGEX_SUBS = (
+    (r"sub-sub-", r"sub-"),
+    (r"ses-ses-", r"ses-"),
+    (r"_+", "_"),
+    (r"(/)_", r"\1"),
+    (r"(_)\.", r"\."),
+    (r"-+", "-"),
+    (r"//+", "/"),
+    (r"[\\/]$", ""),
+    (r"_ses-None", ""),  # in case something injected a None
+    (r"(\.nii\.gz)\1+$", r"\1"),
+    (r"(\.nii)\1+$", r"\1"),
+)
+
+
+@functools.lru_cache(maxsize=None)
+def get_bids_regex_subs(
     out_dir,
     pipeline_name,
-    strip_dir,
     datatype="anat",
-    name=None,
     rec_label=None,
     seg_label=None,
     surf_label=None,
     desc_label=None,
-    custom_subs=None,
-    custom_regex_subs=None,
 ):
     """
-    Creates a BIDS-compatible datasink using parameterization and
-    regex substitutions.
-    Organizes outputs into:
-    <out_dir>/derivatives/<pipeline_name>/sub-<ID>/[ses-<ID>/]
-    <datatype>/<BIDS_filename>
-    """
-    if not strip_dir:
-        raise ValueError(
-            "`strip_dir` (Nipype work dir base path) is required."
-        )
-    if name is None:
-        name = f"{pipeline_name}_datasink"
+    Build the regex substitutions mapping nipype outputs to BIDS paths.
+    The rules only depend on the arguments, so they are built once per
+    datasink configuration and shared between datasinks.
+    See `create_bids_datasink` for the arguments.
 
-    datasink = pe.Node(
-        nio.DataSink(
-            base_directory=out_dir, parameterization=True, strip_dir=strip_dir
-        ),
-        name=name,
-    )
+    Returns:
+        tuple: Tuple of (pattern, replacement) pairs, followed by the
+        generic cleanup rules `BIDS_CLEANUP_REGEX_SUBS`.
+    """
 
     regex_subs = []
 
@@ -377,22 +650,56 @@ def create_bids_datasink(
             )
         )
 
-    # --- Generic cleanup rules (unchanged, but keep them
-    # after the mapping rules) ---
-    regex_subs.extend(
-        [
-            (r"sub-sub-", r"sub-"),
-            (r"ses-ses-", r"ses-"),
-            (r"_+", "_"),
-            (r"(/)_", r"\1"),
-            (r"(_)\.", r"\."),
-            (r"-+", "-"),
-            (r"//+", "/"),
-            (r"[\\/]$", ""),
-            (r"_ses-None", ""),  # in case something injected a None
-            (r"(\.nii\.gz)\1+$", r"\1"),
-            (r"(\.nii)\1+$", r"\1"),
-        ]
+    regex_subs.extend(BIDS_CLEANUP_REGEX_SUBS)
+
+    return tuple(regex_subs)
+
+
+def create_bids_datasink(
+    out_dir,
+    pipeline_name,
+    strip_dir,
+    datatype="anat",
+    name=None,
+    rec_label=None,
+    seg_label=None,
+    surf_label=None,
+    desc_label=None,
+    custom_subs=None,
+    custom_regex_subs=None,
+):
+    """
+    Creates a BIDS-compatible datasink using parameterization and
+    regex substitutions.
+    Organizes outputs into:
+    <out_dir>/derivatives/<pipeline_name>/sub-<ID>/[ses-<ID>/]
+    <datatype>/<BIDS_filename>
+    """
+    if not strip_dir:
+        raise ValueError(
+            "`strip_dir` (Nipype work dir base path) is required."
+        )
+    if name is None:
+        name = f"{pipeline_name}_datasink"
+
+    datasink = pe.Node(
+        nio.DataSink(
+            base_directory=out_dir, parameterization=True, strip_dir=strip_dir
+        ),
+        name=name,
+        run_without_submitting=True,
+    )
+
+    regex_subs = list(
+        get_bids_regex_subs(
+            out_dir,
+            pipeline_name,
+            datatype,
+            rec_label,
+            seg_label,
+            surf_label,
+            desc_label,
+        )
     )
 
     # Add custom regex substitutions
@@ -410,6 +717,79 @@ def create_bids_datasink(
     return datasink
 
 
+# Maps the folders of the datasource iterables
+# (_acquisition_<acq>_session_<ses>_subject_<sub>) to BIDS folders.
+SUBJECT_FOLDER_REGEX_SUB = (
+    r"_acquisition_([^/_]+)_session_([^/_]+)_subject_([^/_]+)",
+    r"sub-\3/ses-\2/anat",
+)
+
+
+def read_json(json_path):
+    """
+    Parse a JSON file, with orjson if it is installed.
+
+    Args:
+        json_path (str): Path to the JSON file.
+    Returns:
+        dict: The content of the JSON file.
+    """
+    if orjson is not None:
+        with open(json_path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(json_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@functools.lru_cache(maxsize=None)
+def load_json(json_path):
+    """
+    Load a JSON file, parsing it only once per process. The returned
+    dictionary is shared between calls and must be copied before
+    being modified.
+
+    Args:
+        json_path (str): Path to the JSON file.
+    Returns:
+        dict: The content of the JSON file.
+    """
+    return read_json(json_path)
+
+
+@functools.lru_cache(maxsize=8)
+def read_dataset_description(desc_path, mtime_ns):
+    """
+    Parse a dataset_description.json file. The modification time is
+    part of the cache key, so that an edited file is parsed again.
+    The returned dictionary is shared between calls and must be copied
+    before being modified.
+
+    Args:
+        desc_path (str): Path to the dataset_description.json file.
+        mtime_ns (int): Modification time of the file, in nanoseconds.
+    Returns:
+        dict: The content of the file.
+    """
+    return read_json(desc_path)
+
+
+def load_dataset_description(data_dir):
+    """
+    Load the dataset_description.json of a BIDS dataset.
+
+    Args:
+        data_dir (str): The base directory of the BIDS dataset.
+    Returns:
+        dict: The content of the file, or None if it does not exist.
+    """
+    desc_path = os.path.join(data_dir, "dataset_description.json")
+    try:
+        mtime_ns = os.stat(desc_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return read_dataset_description(desc_path, mtime_ns)
+
+
 def create_datasink(
     iterables, name="output", params_subs={}, params_regex_subs={}
 ):
@@ -421,7 +801,9 @@ def create_datasink(
 
     Args:
         iterables (list or tuple): A collection of iterables, containing
-                                   subject and session information.
+                                   subject and session information. Not
+                                   used anymore, as the subject folders
+                                   are matched by `SUBJECT_FOLDER_REGEX_SUB`.
         name (str, optional): The name for the data sink container.
                               Defaults to "output".
         params_subs (dict, optional): A dictionary of parameter substitutions
@@ -439,44 +821,74 @@ def create_datasink(
     print("Datasink name: ", name)
 
     # Create the datasink node
-    datasink = pe.Node(nio.DataSink(), name=name)
-
-    # Generate subject folders with session and subject information
-    subjFolders = [
-        (
-            "_acquisition_%s_session_%s_subject_%s" % (acq, ses, sub),
-            "sub-%s/ses-%s/anat" % (sub, ses),
-        )
-        for (sub, ses, acq) in iterables[1]  # doublecheck
-    ]
-
-    print("subjFolders: ", subjFolders)
+    datasink = pe.Node(
+        nio.DataSink(), name=name, run_without_submitting=True
+    )
 
     # Load parameter substitutions from the 'subs.json' file
     json_subs = op.join(op.dirname(op.abspath(__file__)), "subs.json")
-    dict_subs = json.load(open(json_subs, encoding="utf-8"))
+    dict_subs = dict(load_json(json_subs))
     dict_subs.update(params_subs)  # Override with any provided substitutions
 
-    subs = [(key, value) for key, value in dict_subs.items()]
-    subjFolders.extend(subs)  # Add parameter substitutions to folders
-
-    datasink.inputs.substitutions = subjFolders
-
     # Load regex-based substitutions from the 'regex_subs.json' file
     json_regex_subs = op.join(
         op.dirname(op.abspath(__file__)), "regex_subs.json"
     )
-    dict_regex_subs = json.load(open(json_regex_subs, encoding="utf-8"))
+    dict_regex_subs = dict(load_json(json_regex_subs))
 
     # Update with provided regex substitutions
     dict_regex_subs.update(params_regex_subs)
 
-    regex_subs = [(key, value) for key, value in dict_regex_subs.items()]
+    # Map the subject folders generated by the iterables to BIDS folders
+    # with a single rule, rather than one substitution per iterable that
+    # the datasink would have to try on every output file.
+    # The DataSink applies `substitutions` before `regexp_substitutions`:
+    # the subs.json rules are given as escaped regexps, so that they
+    # still run after the subject folders are mapped (a label such as
+    # "res1" or "roi01" would otherwise be altered by the `_res` or `_roi`
+    # rules, and the folder no longer matched).
+    regex_subs = [SUBJECT_FOLDER_REGEX_SUB]
+    regex_subs.extend(
+        (re.escape(key), value.replace("\\", "\\\\"))
+        for key, value in dict_subs.items()
+    )
+    regex_subs.extend((key, value) for key, value in dict_regex_subs.items())
     datasink.inputs.regexp_substitutions = regex_subs
 
     return datasink
 
 
+@functools.lru_cache(maxsize=8)
+def load_gestational_ages(participants_path):
+    """
+    Read the gestational ages from a participants.tsv file.
+    The file is parsed once per process, and the ages are then looked
+    up in a dictionary by `get_gestational_age`.
+
+    Args:
+        participants_path : The path to the participants.tsv file.
+    Returns:
+        dict : A mapping from participant_id to gestational age.
+    """
+    import pandas as pd
+
+    try:
+        df = pd.read_csv(
+            participants_path,
+            delimiter="\t",
+            usecols=["participant_id", "gestational_age"],
+        )
+    except FileNotFoundError:
+        raise FileNotFoundError(
+            f"participants.tsv not found in {op.dirname(participants_path)}"
+        )
+    except ValueError:
+        raise KeyError(
+            "Column 'gestational_age' not found in participants.tsv"
+        )
+    return dict(zip(df["participant_id"], df["gestational_age"]))
+
+
 def get_gestational_age(bids_dir, T2):
     """
     Retrieve the gestational age for a specific subject from a BIDS dataset.
@@ -490,27 +902,17 @@ def get_gestational_age(bids_dir, T2):
         gestational_age : The gestational age of the subject.
 
     """
-    import pandas as pd
     import os
+    from fetpype.utils.utils_bids import load_gestational_ages
 
     participants_path = f"{bids_dir}/participants.tsv"
-
-    try:
-        df = pd.read_csv(participants_path, delimiter="\t")
-    except FileNotFoundError:
-        raise FileNotFoundError(f"participants.tsv not found in {bids_dir}")
+    gestational_ages = load_gestational_ages(participants_path)
 
     # TODO This T2[0] not really clean
     subject_id = os.path.basename(T2).split("_")[0]
     try:
-        gestational_age = df.loc[
-            df["participant_id"] == f"{subject_id}", "gestational_age"
-        ].values[0]
+        gestational_age = gestational_ages[subject_id]
     except KeyError:
-        raise KeyError(
-            "Column 'gestational_age' not found in participants.tsv"
-        )
-    except IndexError:
         raise IndexError(
             f"Subject sub-{subject_id} not found in participants.tsv"
         )
@@ -518,41 +920,50 @@ def get_gestational_age(bids_dir, T2):
     return gestational_age
 
 
-def create_description_file(out_dir, algo, prev_desc=None, cfg=None):
+def create_description_file(
+    out_dir, algo, prev_desc=None, cfg=None, prev_desc_data=None
+):
     """Create a dataset_description.json file in the derivatives folder.
+    Nothing is done if the file already exists, so that the config is
+    only resolved and serialized on the first run.
     TODO: should look for the extra parameters and also add them
 
     Args:
-        args : Dictionary containing the arguments passed to the script.
-        container_type : Type of container used to run the algorithm.
+        out_dir (str): The derivatives folder of the pipeline.
+        algo (str): Name of the algorithm that generated the data.
+        prev_desc (str, optional): Path to the dataset_description.json
+            of the input dataset, added to `GeneratedBy`.
+        cfg (optional): Configuration of the algorithm, saved
+            (resolved) under `Config`.
+        prev_desc_data (dict, optional): Content of the
+            dataset_description.json of the input dataset, if it was
+            already loaded. Takes precedence over `prev_desc`.
     """
-    if not os.path.exists(os.path.join(out_dir, "dataset_description.json")):
-        description = {
+    desc_file = os.path.join(out_dir, "dataset_description.json")
+    if os.path.exists(desc_file):
+        return
+
+    description = {
+        "Name": algo,
+        "Version": "1.0",
+        "BIDSVersion": "1.7.0",
+        "PipelineDescription": {
             "Name": algo,
-            "Version": "1.0",
-            "BIDSVersion": "1.7.0",
-            "PipelineDescription": {
+        },
+        "GeneratedBy": [
+            {
                 "Name": algo,
-            },
-            "GeneratedBy": [
-                {
-                    "Name": algo,
-                }
-            ],
-        }
-
-        if prev_desc is not None:
-            with open(prev_desc, "r") as f:
-                prev_desc = json.load(f)
-                description["GeneratedBy"].append({"Name": prev_desc["Name"]})
-        if cfg is not None:
-            description["Config"] = OmegaConf.to_container(cfg, resolve=True)
-        with open(
-            os.path.join(
-                out_dir,
-                "dataset_description.json",
-            ),
-            "w",
-            encoding="utf-8",
-        ) as outfile:
-            json.dump(description, outfile, indent=4)
+            }
+        ],
+    }
+
+    if prev_desc_data is None and prev_desc is not None:
+        prev_desc_data = read_dataset_description(
+            prev_desc, os.stat(prev_desc).st_mtime_ns
+        )
+    if prev_desc_data is not None:
+        description["GeneratedBy"].append({"Name": prev_desc_data["Name"]})
+    if cfg is not None:
+        description["Config"] = OmegaConf.to_container(cfg, resolve=True)
+    with open(desc_file, "w", encoding="utf-8") as outfile:
+        json.dump(description, outfile, indent=4)
@@ -16,8 +16,12 @@ from fetpype.workflows.utils import (  # noqa: E402
     check_and_update_paths,
     get_pipeline_name,
     check_valid_pipeline,
+    get_subject_batches,
+    prefetch_layout,
+    run_workflow,
+    get_bids_ignore,
 )
-from fetpype.utils.logging import setup_logging, status_line
+from fetpype.utils.logging import setup_logging
 import logging
 
 
@@ -99,6 +103,11 @@ def create_main_workflow(
 
     check_valid_pipeline(cfg)
 
+    # The layout is indexed while the pipeline is being built
+    layout_future = prefetch_layout(
+        data_dir, nipype_dir, subjects, cfg, save_db=True
+    )
+
     # main_workflow
     main_workflow = pe.Workflow(name=pipeline_name)
     main_workflow.base_dir = nipype_dir
@@ -127,6 +136,9 @@ def create_main_workflow(
         sessions,
         acquisitions,
         extra_derivatives=masks_dir,
+        save_db=True,
+        layout=layout_future.result(),
+        ignore_datatypes=get_bids_ignore(cfg),
     )
 
     input_data = pe.Workflow(name="input")
@@ -243,17 +255,7 @@ def create_main_workflow(
         "@surf_rh",
     )
 
-    if cfg.save_graph:
-        main_workflow.write_graph(
-            graph2use="colored",
-            format="png",
-            simple_form=True,
-        )
-
-    main_workflow.run(
-        plugin="MultiProc",
-        plugin_args={"n_procs": nprocs, "status_callback": status_line},
-    )
+    run_workflow(main_workflow, cfg, nprocs)
 
 
 def main():
@@ -274,20 +276,21 @@ def main():
 
     # main_workflow
     print("Initialising the pipeline...")
-    create_main_workflow(
-        data_dir=args.data,
-        masks_dir=args.masks,
-        out_dir=args.out,
-        nipype_dir=args.nipype_dir,
-        subjects=args.sub,
-        sessions=args.ses,
-        acquisitions=args.acq,
-        cfg_path=args.cfg_path,
-        nprocs=args.nprocs,
-        save_intermediates=args.save_intermediates,
-        debug=args.debug,
-        verbose=args.verbose,
-    )
+    for subjects in get_subject_batches(args.data, args.sub, args.batch_size):
+        create_main_workflow(
+            data_dir=args.data,
+            masks_dir=args.masks,
+            out_dir=args.out,
+            nipype_dir=args.nipype_dir,
+            subjects=subjects,
+            sessions=args.ses,
+            acquisitions=args.acq,
+            cfg_path=args.cfg_path,
+            nprocs=args.nprocs,
+            save_intermediates=args.save_intermediates,
+            debug=args.debug,
+            verbose=args.verbose,
+        )
 
 
 if __name__ == "__main__":
@@ -200,7 +200,9 @@ def create_main_workflow(
     if "no_graph" in params["general"] and params["general"]["no_graph"]:
         main_workflow.write_graph(graph2use="colored")
 
-    main_workflow.config["execution"] = {"remove_unnecessary_outputs": "false"}
+    main_workflow.config["execution"].update(
+        {"remove_unnecessary_outputs": "false"}
+    )
 
     if nprocs is None:
         nprocs = 4
@@ -16,8 +16,12 @@ from fetpype.workflows.utils import (
     get_pipeline_name,
     get_default_parser,
     check_valid_pipeline,
+    get_subject_batches,
+    prefetch_layout,
+    run_workflow,
+    get_bids_ignore,
 )
-from fetpype.utils.logging import setup_logging, status_line
+from fetpype.utils.logging import setup_logging
 
 ###############################################################################
 
@@ -94,6 +98,11 @@ def create_rec_workflow(
     check_valid_pipeline(cfg)
     # if general, pipeline is not in params ,create it and set it to niftymic
 
+    # The layout is indexed while the pipeline is being built
+    layout_future = prefetch_layout(
+        data_dir, nipype_dir, subjects, cfg, save_db=True
+    )
+
     # main_workflow
     main_workflow = pe.Workflow(name=pipeline_name)
     main_workflow.base_dir = nipype_dir
@@ -122,6 +131,9 @@ def create_rec_workflow(
         sessions,
         acquisitions,
         extra_derivatives=masks_dir,
+        save_db=True,
+        layout=layout_future.result(),
+        ignore_datatypes=get_bids_ignore(cfg),
     )
     main_workflow.connect(datasource, "stacks", fet_pipe, "inputnode.stacks")
     if load_masks:
@@ -147,17 +159,7 @@ def create_rec_workflow(
         fet_pipe, "outputnode.output_srr", datasink, f"@{pipeline_name}"
     )
 
-    if cfg.save_graph:
-        main_workflow.write_graph(
-            graph2use="colored",
-            format="png",
-            simple_form=True,
-        )
-
-    main_workflow.run(
-        plugin="MultiProc",
-        plugin_args={"n_procs": nprocs, "status_callback": status_line},
-    )
+    run_workflow(main_workflow, cfg, nprocs)
 
 
 def main():
@@ -177,19 +179,20 @@ def main():
 
     # main_workflow
     print("Initialising the pipeline...")
-    create_rec_workflow(
-        data_dir=args.data,
-        masks_dir=args.masks,
-        out_dir=args.out,
-        nipype_dir=args.nipype_dir,
-        subjects=args.sub,
-        sessions=args.ses,
-        acquisitions=args.acq,
-        cfg_path=args.cfg_path,
-        nprocs=args.nprocs,
-        debug=args.debug,
-        verbose=args.verbose,
-    )
+    for subjects in get_subject_batches(args.data, args.sub, args.batch_size):
+        create_rec_workflow(
+            data_dir=args.data,
+            masks_dir=args.masks,
+            out_dir=args.out,
+            nipype_dir=args.nipype_dir,
+            subjects=subjects,
+            sessions=args.ses,
+            acquisitions=args.acq,
+            cfg_path=args.cfg_path,
+            nprocs=args.nprocs,
+            debug=args.debug,
+            verbose=args.verbose,
+        )
 
 
 if __name__ == "__main__":
@@ -1,14 +1,4 @@
 import os
-import json
-import nipype.pipeline.engine as pe
-from fetpype.pipelines.full_pipeline import (
-    create_seg_pipeline,
-)
-from fetpype.utils.utils_bids import (
-    create_datasource,
-    create_bids_datasink,
-    create_description_file,
-)
 from fetpype import VALID_RECONSTRUCTION
 from fetpype.workflows.utils import (
     init_and_load_cfg,
@@ -16,12 +6,45 @@ from fetpype.workflows.utils import (
     get_pipeline_name,
     get_default_parser,
     check_valid_pipeline,
+    get_subject_batches,
+    prefetch_layout,
+    run_workflow,
+    get_bids_ignore,
 )
-from fetpype.utils.logging import setup_logging, status_line
+
+# Built once: the set for the membership checks, the string for the help
+VALID_RECONSTRUCTION_SET = frozenset(VALID_RECONSTRUCTION)
+VALID_RECONSTRUCTION_STR = ", ".join(VALID_RECONSTRUCTION)
 
 ###############################################################################
 
 
+def check_input_dataset(data_dir, data_desc):
+    """
+    Check that the dataset was reconstructed with one of the
+    validated reconstruction methods.
+
+    Args:
+        data_dir (str): Path to the BIDS directory.
+        data_desc (dict): Content of its dataset_description.json,
+            or None if the file does not exist.
+    """
+    if data_desc is None:
+        raise ValueError(
+            f"dataset_description.json file not found in {data_dir}. "
+            "Please provide a valid BIDS directory."
+        )
+    name = data_desc.get("Name", "").split("_")[0]
+    if name not in VALID_RECONSTRUCTION_SET:
+        raise ValueError(
+            f"Method name <{data_desc['Name']}> is not a valid "
+            "reconstruction method. Are you sure that you are "
+            "passing a reconstructed dataset?\n"
+            "If you know what you are doing, you can ignore "
+            "this error by adding --ignore_check to the command line."
+        )
+
+
 def create_seg_workflow(
     data_dir,
     out_dir,
@@ -65,6 +88,17 @@ def create_seg_workflow(
         verbose (bool):
             Whether to enable verbose mode.
     """
+    # nipype and pybids are only imported when the workflow is created
+    import nipype.pipeline.engine as pe
+    from fetpype.pipelines.full_pipeline import create_seg_pipeline
+    from fetpype.utils.utils_bids import (
+        create_datasource,
+        create_bids_datasink,
+        create_description_file,
+        load_dataset_description,
+    )
+    from fetpype.utils.logging import setup_logging
+
     cfg = init_and_load_cfg(cfg_path)
     pipeline_name = get_pipeline_name(cfg, only_seg=True)
     data_dir, out_dir, nipype_dir = check_and_update_paths(
@@ -81,27 +115,15 @@ def create_seg_workflow(
     check_valid_pipeline(cfg)
     # if general, pipeline is not in params ,create it and set it to niftymic
 
-    data_desc = os.path.join(data_dir, "dataset_description.json")
+    data_desc = load_dataset_description(data_dir)
     if not ignore_checks:
-        if os.path.exists(data_desc):
-            with open(data_desc, "r") as f:
-                data_desc = json.load(f)
-            name = data_desc.get("Name", None)
-            if "_" in name:
-                name = name.split("_")[0]
-            if name not in VALID_RECONSTRUCTION:
-                raise ValueError(
-                    f"Method name <{data_desc['Name']}> is not a valid "
-                    "reconstruction method. Are you sure that you are "
-                    "passing a reconstructed dataset?\n"
-                    "If you know what you are doing, you can ignore "
-                    "this error by adding --ignore_check to the command line."
-                )
-        else:
-            raise ValueError(
-                f"dataset_description.json file not found in {data_dir}. "
-                "Please provide a valid BIDS directory."
-            )
+        check_input_dataset(data_dir, data_desc)
+
+    # The layout is indexed while the pipeline is being built
+    layout_future = prefetch_layout(
+        data_dir, nipype_dir, subjects, cfg, save_db=True
+    )
+
     # main_workflow
     main_workflow = pe.Workflow(name=pipeline_name)
     main_workflow.base_dir = nipype_dir
@@ -123,6 +145,9 @@ def create_seg_workflow(
         subjects,
         sessions,
         acquisitions,
+        save_db=True,
+        layout=layout_future.result(),
+        ignore_datatypes=get_bids_ignore(cfg),
     )
 
     # in both cases we connect datsource outputs to main pipeline
@@ -140,14 +165,8 @@ def create_seg_workflow(
     os.makedirs(datasink_path, exist_ok=True)
 
     # Create datasink
-    pipeline_name = cfg.segmentation.pipeline
-    os.makedirs(datasink_path, exist_ok=True)
-    prev_desc = os.path.join(data_dir, "dataset_description.json")
-    if not os.path.exists(prev_desc):
-        prev_desc = None
-
     create_description_file(
-        out_dir, pipeline_name, prev_desc, cfg.segmentation
+        out_dir, pipeline_name, cfg=cfg.segmentation, prev_desc_data=data_desc
     )
     # Create another datasink for the segmentation pipeline
     seg_datasink = create_bids_datasink(
@@ -165,16 +184,7 @@ def create_seg_workflow(
         fet_pipe, "outputnode.output_seg", seg_datasink, pipeline_name
     )
 
-    if cfg.save_graph:
-        main_workflow.write_graph(
-            graph2use="colored",
-            format="png",
-            simple_form=True,
-        )
-    main_workflow.run(
-        plugin="MultiProc",
-        plugin_args={"n_procs": nprocs, "status_callback": status_line},
-    )
+    run_workflow(main_workflow, cfg, nprocs)
 
 
 def main():
@@ -186,26 +196,27 @@ def main():
         action="store_true",
         help=(
             "Ignore the check to only use data from the list of validated SRR "
-            f"{', '.join(VALID_RECONSTRUCTION)}."
+            f"{VALID_RECONSTRUCTION_STR}."
         ),
     )
     args = parser.parse_args()
 
     # main_workflow
     print("Initialising the pipeline...")
-    create_seg_workflow(
-        data_dir=args.data,
-        out_dir=args.out,
-        nipype_dir=args.nipype_dir,
-        subjects=args.sub,
-        sessions=args.ses,
-        acquisitions=args.acq,
-        cfg_path=args.cfg_path,
-        nprocs=args.nprocs,
-        ignore_checks=args.ignore_checks,
-        debug=args.debug,
-        verbose=args.verbose,
-    )
+    for subjects in get_subject_batches(args.data, args.sub, args.batch_size):
+        create_seg_workflow(
+            data_dir=args.data,
+            out_dir=args.out,
+            nipype_dir=args.nipype_dir,
+            subjects=subjects,
+            sessions=args.ses,
+            acquisitions=args.acq,
+            cfg_path=args.cfg_path,
+            nprocs=args.nprocs,
+            ignore_checks=args.ignore_checks,
+            debug=args.debug,
+            verbose=args.verbose,
+        )
 
 
 if __name__ == "__main__":
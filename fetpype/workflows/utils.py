@@ -1,8 +1,13 @@
 import argparse
 import hydra
 import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from omegaconf import OmegaConf
 
+# Plugins running the nodes in local processes, limited by --nprocs
+LOCAL_PARALLEL_PLUGINS = ("MultiProc", "LegacyMultiProc")
+
 
 def get_default_parser(desc):
 
@@ -73,6 +78,19 @@ def get_default_parser(desc):
         ),
     )
 
+    parser.add_argument(
+        "--batch_size",
+        dest="batch_size",
+        type=int,
+        default=None,
+        help=(
+            "Number of subjects processed by each workflow. Subjects are "
+            "split into batches that are run one after the other, which "
+            "keeps the nipype graphs small on large datasets "
+            "(default: all subjects in a single workflow)."
+        ),
+    )
+
     parser.add_argument(
         "--config",
         dest="cfg_path",
@@ -119,6 +137,34 @@ def get_default_parser(desc):
     return parser
 
 
+def get_subject_batches(data_dir, subjects=None, batch_size=None):
+    """
+    Split the subjects to process into batches of `batch_size` subjects.
+    Args:
+        data_dir (str): Path to the BIDS directory.
+        subjects (list[str], optional): Subjects to process. If None,
+            every sub-<label> folder of `data_dir` is used.
+        batch_size (int, optional): Number of subjects per batch.
+    Returns:
+        list: List of batches of subjects. If `batch_size` is None,
+        a single batch containing `subjects`, unchanged.
+    """
+    if batch_size is None:
+        return [subjects]
+    if batch_size < 1:
+        raise ValueError(f"batch_size should be positive, got {batch_size}.")
+    if subjects is None:
+        subjects = sorted(
+            entry.name[len("sub-"):]
+            for entry in os.scandir(data_dir)
+            if entry.is_dir() and entry.name.startswith("sub-")
+        )
+    return [
+        subjects[i:i + batch_size]
+        for i in range(0, len(subjects), batch_size)
+    ]
+
+
 def get_pipeline_name(cfg, only_rec=False, only_seg=False, only_surf=False):
     """
     Get the pipeline name from the configuration file.
@@ -228,3 +274,158 @@ def check_valid_pipeline(cfg):
                 f"Invalid surface pipeline: {cfg.surface.pipeline}."
                 f"Please choose one of {VALID_SURFACE}"
             )
+
+
+def get_plugin(cfg, nprocs):
+    """
+    Get the nipype plugin used to run the workflow, and its arguments.
+    By default, the workflow is run with MultiProc on `nprocs` processes.
+    Both can be overridden with the optional `plugin` and `plugin_args`
+    entries of the configuration, e.g. to run more containers
+    concurrently than there are CPUs, or to use a cluster plugin
+    such as SLURMGraph, which submits all the jobs at once.
+    The per-node status lines are printed for all but the graph plugins,
+    which do not support a status callback.
+
+    Args:
+        cfg: Configuration object.
+        nprocs (int): Number of processes to be launched by MultiProc.
+    Returns:
+        tuple: The name of the plugin and its arguments.
+    """
+    from fetpype.utils.logging import status_line
+
+    plugin = cfg.get("plugin", "MultiProc")
+    plugin_args = {}
+    if plugin in LOCAL_PARALLEL_PLUGINS:
+        plugin_args["n_procs"] = nprocs
+    if cfg.get("plugin_args") is not None:
+        plugin_args.update(OmegaConf.to_container(cfg.plugin_args))
+    # Graph plugins submit all the jobs at once and reject status callbacks
+    if not plugin.endswith("Graph"):
+        plugin_args["status_callback"] = status_line
+    return plugin, plugin_args
+
+
+def set_execution_config(workflow, cfg):
+    """
+    Set the execution options of `workflow` from the configuration.
+    `poll_sleep_duration` is the time (in seconds) the plugin waits
+    between two checks of the running jobs (default: 2). The optional
+    `execution` entry can set any other nipype execution option
+    (e.g. `remove_unnecessary_outputs`, `hash_method`); the options
+    that it does not set keep their default value.
+
+    Args:
+        workflow: The nipype workflow.
+        cfg: Configuration object.
+    """
+    execution = workflow.config["execution"]
+    execution["poll_sleep_duration"] = cfg.get("poll_sleep_duration", 2)
+    if cfg.get("execution") is not None:
+        execution.update(OmegaConf.to_container(cfg.execution))
+
+
+def prefetch_layout(
+    data_dir, nipype_dir, subjects=None, cfg=None, save_db=False
+):
+    """
+    Start loading (or indexing) the BIDSLayout of `data_dir` in a
+    background thread, so that it overlaps with building the pipeline.
+    Args:
+        data_dir (str): Path to the BIDS directory.
+        nipype_dir (str): Path to the nipype directory.
+        subjects (list[str], optional): Subjects to index.
+        cfg (optional): Configuration object. Its optional `bids_ignore`
+            entry lists the datatypes that are not indexed.
+        save_db (bool, optional): Whether to use the cached index
+            (see `create_datasource`). Defaults to False.
+    Returns:
+        concurrent.futures.Future: Future of the layout, to be passed to
+        `create_datasource` with the same arguments.
+    """
+    from fetpype.utils.utils_bids import get_layout
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(
+        get_layout,
+        data_dir,
+        nipype_dir,
+        subjects,
+        save_db,
+        ignore_datatypes=get_bids_ignore(cfg),
+    )
+    executor.shutdown(wait=False)
+    return future
+
+
+def get_bids_ignore(cfg):
+    """
+    Get the datatypes that are not indexed from the optional `bids_ignore`
+    entry of the configuration.
+    Args:
+        cfg: Configuration object.
+    Returns:
+        list: List of datatypes, or None.
+    """
+    if cfg is None or cfg.get("bids_ignore") is None:
+        return None
+    return list(cfg.bids_ignore)
+
+
+def write_graph(workflow, graph_format="png"):
+    """
+    Write the colored graph of `workflow` without waiting for graphviz.
+    The .dot file is written directly, and rendered by `dot` in a
+    background process, so that the workflow can start running in the
+    meantime. Rendering is skipped if the graph did not change since
+    the last run.
+
+    Args:
+        workflow: The nipype workflow.
+        graph_format (str): Format of the rendered graph.
+    Returns:
+        subprocess.Popen: The rendering process, to be waited for once
+        the workflow has run, or None if the graph was not re-rendered.
+    """
+    dot_file = os.path.join(workflow.base_dir, workflow.name, "graph.dot")
+    out_file = f"{os.path.splitext(dot_file)[0]}.{graph_format}"
+
+    previous_graph = None
+    if os.path.exists(dot_file):
+        with open(dot_file, "r") as f:
+            previous_graph = f.read()
+    workflow.write_graph(graph2use="colored", format="dot", simple_form=True)
+    with open(dot_file, "r") as f:
+        graph = f.read()
+
+    if graph == previous_graph and os.path.exists(out_file):
+        return None
+    return subprocess.Popen(
+        ["dot", f"-T{graph_format}", "-o", out_file, dot_file]
+    )
+
+
+def run_workflow(workflow, cfg, nprocs):
+    """
+    Run `workflow` with the execution settings of the configuration.
+    If `save_graph` is set, the graph is rendered in the background
+    while the workflow runs (see `write_graph`), and the rendering is
+    waited for once the workflow has run, even if it failed.
+
+    Args:
+        workflow: The nipype workflow.
+        cfg: Configuration object.
+        nprocs (int): Number of processes to be launched by MultiProc.
+    """
+    graph_proc = None
+    if cfg.save_graph:
+        graph_proc = write_graph(workflow, cfg.get("graph_format", "png"))
+
+    set_execution_config(workflow, cfg)
+    plugin, plugin_args = get_plugin(cfg, nprocs)
+    try:
+        workflow.run(plugin=plugin, plugin_args=plugin_args)
+    finally:
+        if graph_proc is not None:
+            graph_proc.wait()
@@ -0,0 +1,32 @@
+import shlex
+import sys
+
+import pytest
+
+from fetpype.utils.logging import run_and_tee
+
+PYTHON = shlex.quote(sys.executable)
+
+
+def test_run_and_tee_quoted_argument():
+    """Test that a quoted argument reaches the command intact."""
+    cmd = (
+        f"{PYTHON} -c 'import sys; print(sys.argv[1:])' "
+        "--gpus '\"device=0\"' \"a b\""
+    )
+    output = run_and_tee(cmd)
+    assert output == str(["--gpus", '"device=0"', "a b"])
+
+
+def test_run_and_tee_failure():
+    """Test RuntimeError with the output joined line by line on failure."""
+    cmd = f"{PYTHON} -c 'print(\"first\"); print(\"second\"); exit(3)'"
+    with pytest.raises(RuntimeError, match="exit code 3") as exc_info:
+        run_and_tee(cmd)
+    assert "Output:\nfirst\nsecond" in str(exc_info.value)
+
+
+def test_run_and_tee_missing_executable():
+    """Test RuntimeError if the executable does not exist."""
+    with pytest.raises(RuntimeError, match="Could not run command"):
+        run_and_tee("fetpype-missing-executable --help")
@@ -0,0 +1,45 @@
+from fetpype.nodes import link_or_copy, replace_tags
+
+
+# --- Tests for replace_tags ---
+def test_replace_tags_unknown_tag():
+    """Test that the tags missing from `tags` are left untouched."""
+    cmd = "run <input_stacks> --mask <mask> <unknown>"
+    out = replace_tags(cmd, {"input_stacks": "a.nii.gz", "mask": "m.nii.gz"})
+    assert out == "run a.nii.gz --mask m.nii.gz <unknown>"
+
+
+def test_replace_tags_callable():
+    """Test that a callable value is only called if its tag is present."""
+    calls = []
+
+    def get_mount():
+        calls.append("mount")
+        return "-v /data:/data"
+
+    tags = {"mount": get_mount}
+    assert replace_tags("run <input_stacks>", tags) == "run <input_stacks>"
+    assert calls == []
+    assert replace_tags("docker <mount> run", tags) == (
+        "docker -v /data:/data run"
+    )
+    assert calls == ["mount"]
+
+
+def test_replace_tags_single_pass():
+    """Test that a tag inside an inserted value is not substituted."""
+    tags = {"output_dir": "/out/<mask>", "mask": "m.nii.gz"}
+    out = replace_tags("run <output_dir> <mask>", tags)
+    assert out == "run /out/<mask> m.nii.gz"
+
+
+# --- Tests for link_or_copy ---
+def test_link_or_copy_replaces_dst(tmp_path):
+    """Test that an existing `dst` is replaced by `src`."""
+    src = tmp_path / "src.nii.gz"
+    dst = tmp_path / "dst.nii.gz"
+    src.write_text("new")
+    dst.write_text("old")
+
+    assert link_or_copy(str(src), str(dst)) == str(dst)
+    assert dst.read_text() == "new"
@@ -1,9 +1,29 @@
 import pytest
+import os
 import re
 import nipype.pipeline.engine as pe
 import nipype.interfaces.io as nio
-
-from fetpype.utils.utils_bids import create_bids_datasink
+from nipype.interfaces.base import isdefined
+from bids.layout import BIDSLayout
+
+from fetpype.utils.utils_bids import (
+    create_bids_datasink,
+    build_layout,
+    create_datasink,
+    create_datasource,
+    get_layout,
+    get_layout_db_path,
+    get_subject_entities,
+    load_dataset_description,
+)
+
+OUTPUT_QUERY = {
+    "stacks": {
+        "datatype": "anat",
+        "suffix": "T2w",
+        "extension": ["nii", ".nii.gz"],
+    },
+}
 
 
 # Helper for sorting lists containing None
@@ -14,6 +34,177 @@ def sort_key(item):
     )  # Ensure all are strings or comparable
 
 
+# --- Tests for create_datasource ---
+def test_create_datasource_iterables(mock_bids_root, mock_nipype_wf_dir):
+    """Test that all (sub, ses, acq) combinations are found."""
+    ds = create_datasource(
+        OUTPUT_QUERY, str(mock_bids_root), mock_nipype_wf_dir
+    )
+
+    assert ds.iterables[0] == ("subject", "session", "acquisition")
+    assert sorted(ds.iterables[1], key=sort_key) == sorted(
+        [
+            ("01", "01", "fast"),
+            ("01", "02", None),
+            ("02", None, "slow"),
+            ("03", "01", "fast"),
+        ],
+        key=sort_key,
+    )
+
+
+def test_create_datasource_layout_cache(mock_bids_root, mock_nipype_wf_dir):
+    """Test that the layout index is saved once and then reused."""
+    data_dir = str(mock_bids_root)
+    layout_db = get_layout_db_path(data_dir, mock_nipype_wf_dir)
+
+    ds = create_datasource(OUTPUT_QUERY, data_dir, mock_nipype_wf_dir)
+    assert not isdefined(ds.inputs.load_layout)
+    assert not ds.run_without_submitting
+    assert not os.path.exists(layout_db)
+
+    ds = create_datasource(
+        OUTPUT_QUERY, data_dir, mock_nipype_wf_dir, save_db=True
+    )
+    db_file = os.path.join(layout_db, "layout_index.sqlite")
+    assert ds.inputs.load_layout == layout_db
+    assert ds.run_without_submitting
+    assert os.path.exists(db_file)
+    mtime = os.stat(db_file).st_mtime_ns
+
+    ds_cached = create_datasource(
+        OUTPUT_QUERY, data_dir, mock_nipype_wf_dir, save_db=True
+    )
+    assert os.stat(db_file).st_mtime_ns == mtime
+    assert ds_cached.iterables == ds.iterables
+
+    # Adding a subject changes the key of the cache
+    (mock_bids_root / "sub-04" / "anat").mkdir(parents=True)
+    (mock_bids_root / "sub-04" / "anat" / "sub-04_T2w.nii.gz").touch()
+    layout_db_new = get_layout_db_path(data_dir, mock_nipype_wf_dir)
+    assert layout_db_new != layout_db
+    ds_new = create_datasource(
+        OUTPUT_QUERY, data_dir, mock_nipype_wf_dir, save_db=True
+    )
+    assert ("04", None, None) in ds_new.iterables[1]
+
+    # So does adding a stack to an existing subject folder
+    anat_dir = mock_bids_root / "sub-02" / "anat"
+    (anat_dir / "sub-02_acq-haste_T2w.nii.gz").touch()
+    assert get_layout_db_path(data_dir, mock_nipype_wf_dir) != layout_db_new
+    ds_new = create_datasource(
+        OUTPUT_QUERY, data_dir, mock_nipype_wf_dir, save_db=True
+    )
+    assert ("02", None, "haste") in ds_new.iterables[1]
+
+
+def test_get_layout_prune(mock_bids_root, mock_nipype_wf_dir):
+    """Test that only the outdated indexes of the dataset are removed."""
+    data_dir = str(mock_bids_root)
+    get_layout(data_dir, mock_nipype_wf_dir, save_db=True)
+    get_layout(data_dir, mock_nipype_wf_dir, ["02"], save_db=True)
+    layout_db = get_layout_db_path(data_dir, mock_nipype_wf_dir)
+    layout_db_sub = get_layout_db_path(data_dir, mock_nipype_wf_dir, ["02"])
+
+    (mock_bids_root / "sub-01" / "anat").mkdir()
+    (mock_bids_root / "sub-01" / "anat" / "sub-01_T2w.nii.gz").touch()
+    get_layout(data_dir, mock_nipype_wf_dir, save_db=True)
+    layout_db_new = get_layout_db_path(data_dir, mock_nipype_wf_dir)
+
+    assert layout_db_new != layout_db
+    assert os.path.exists(layout_db_new)
+    assert not os.path.exists(layout_db)
+    assert os.path.exists(layout_db_sub)
+
+
+def test_create_datasource_subjects(mock_bids_root, mock_nipype_wf_dir):
+    """Test that only the requested subjects are indexed."""
+    data_dir = str(mock_bids_root)
+    assert build_layout(data_dir, ["01", "0"]).get_subjects() == ["01"]
+
+    ds = create_datasource(
+        OUTPUT_QUERY,
+        data_dir,
+        mock_nipype_wf_dir,
+        subjects=["02"],
+        save_db=True,
+    )
+    assert ds.iterables[1] == [("02", None, "slow")]
+    assert ds.inputs.load_layout == get_layout_db_path(
+        data_dir, mock_nipype_wf_dir, ["02"]
+    )
+    assert ds.inputs.load_layout != get_layout_db_path(
+        data_dir, mock_nipype_wf_dir
+    )
+
+
+def test_create_datasource_layout(mock_bids_root, mock_nipype_wf_dir):
+    """Test that a layout built beforehand gives the same datasource."""
+    data_dir = str(mock_bids_root)
+    layout = get_layout(data_dir, mock_nipype_wf_dir, ["02"], save_db=True)
+    ds = create_datasource(
+        OUTPUT_QUERY,
+        data_dir,
+        mock_nipype_wf_dir,
+        subjects=["02"],
+        save_db=True,
+        layout=layout,
+    )
+    assert ds.iterables[1] == [("02", None, "slow")]
+    assert ds.inputs.load_layout == get_layout_db_path(
+        data_dir, mock_nipype_wf_dir, ["02"]
+    )
+
+
+def test_build_layout_ignore_datatypes(mock_bids_root, mock_nipype_wf_dir):
+    """Test that the ignored datatypes are not indexed."""
+    data_dir = str(mock_bids_root)
+    (mock_bids_root / "sub-01" / "dwi").mkdir()
+    (mock_bids_root / "sub-01" / "dwi" / "sub-01_dwi.nii.gz").touch()
+
+    assert build_layout(data_dir).get(datatype="dwi")
+    layout = build_layout(data_dir, ignore_datatypes=["dwi"])
+    assert not layout.get(datatype="dwi")
+    assert layout.get(datatype="anat", suffix="T2w")
+    assert get_layout_db_path(
+        data_dir, mock_nipype_wf_dir, ignore_datatypes=["dwi"]
+    ) != get_layout_db_path(data_dir, mock_nipype_wf_dir)
+
+    # The datasource loads an index where they are ignored as well
+    ds = create_datasource(
+        OUTPUT_QUERY,
+        data_dir,
+        mock_nipype_wf_dir,
+        save_db=True,
+        ignore_datatypes=["dwi"],
+    )
+    assert not BIDSLayout.load(ds.inputs.load_layout).get(datatype="dwi")
+
+
+def test_get_subject_entities(mock_bids_root):
+    """Test that sessions and acquisitions are grouped per subject."""
+    layout = build_layout(str(mock_bids_root))
+    entities = get_subject_entities(layout, ["01", "02"])
+
+    assert entities == {
+        "01": {"01": ["fast"], "02": []},
+        "02": {None: ["slow"]},
+    }
+
+
+def test_create_datasource_missing_subject(
+    mock_bids_root, mock_nipype_wf_dir
+):
+    """Test ValueError if a requested subject does not exist."""
+    with pytest.raises(ValueError, match="subject 99 was not found"):
+        create_datasource(
+            OUTPUT_QUERY,
+            str(mock_bids_root),
+            mock_nipype_wf_dir,
+            subjects=["99"],
+        )
+
+
 # --- Tests for create_bids_datasink ---
 def test_create_datasink_node_creation(mock_output_dir, mock_nipype_wf_dir):
     """Test basic node creation and input propagation."""
@@ -50,6 +241,20 @@ def apply_regex_subs(path_in, regex_subs):
     return path_out
 
 
+def test_create_datasink_subject_folders():
+    """Test that labels matching subs.json keys keep their subject folder.
+
+    The DataSink applies `substitutions` before `regexp_substitutions`.
+    """
+    ds = create_datasink([("subject", "session", "acquisition"), []])
+    path = "/out/_acquisition_res1_session_01_subject_roi01/x.nii.gz"
+    if isdefined(ds.inputs.substitutions):
+        for key, value in ds.inputs.substitutions:
+            path = path.replace(key, value)
+    path = apply_regex_subs(path, ds.inputs.regexp_substitutions)
+    assert path == "/out/sub-roi01/ses-01/anat/x.nii.gz"
+
+
 def test_datasink_regex_simulation_preprocessing_denoised(
     mock_output_dir, mock_nipype_wf_dir
 ):
@@ -217,3 +422,17 @@ def test_datasink_regex_simulation_cleanup(
         )
         == "sub-01/ses-01/anat/sub-01.nii"
     )
+
+
+def test_load_dataset_description(mock_bids_root, tmp_path):
+    """Test that dataset_description.json is parsed again once edited."""
+    desc = load_dataset_description(str(mock_bids_root))
+    assert desc is load_dataset_description(str(mock_bids_root))
+    assert load_dataset_description(str(tmp_path)) is None
+
+    desc_file = tmp_path / "dataset_description.json"
+    desc_file.write_text('{"Name": "nesvor"}')
+    assert load_dataset_description(str(tmp_path)) == {"Name": "nesvor"}
+    desc_file.write_text('{"Name": "svrtk"}')
+    os.utime(desc_file, ns=(0, 0))
+    assert load_dataset_description(str(tmp_path)) == {"Name": "svrtk"}